@@ -1,42 +1,231 @@
+import asyncio
 import io
 import json
 import logging
-import wave  
-from groq import Groq
+import queue
+import re
+import threading
+from collections import OrderedDict
+import httpx
+from groq import AsyncGroq, Groq
 from config import (LLM_MODEL, STT_MODEL, TTS_MODEL, TTS_VOICE,
                     AUDIO_SAMPLE_RATE, GROQ_API_KEY)
 from session_manager import CallSession
-from audio_utils import create_wav_bytes
+from audio_utils import create_wav_bytes, wav_data_offset
+from request_queue import groq_requests
 
-groq_client = Groq(api_key=GROQ_API_KEY)
+# one pooled HTTP/2 connection is shared by STT, LLM and TTS requests;
+# short connect timeout so a stalled handshake doesn't hold up a call
+groq_client = Groq(
+    api_key=GROQ_API_KEY,
+    http_client=httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        timeout=httpx.Timeout(30.0, connect=3.0)
+    )
+)
 
-def synthesize_speech(text, interrupted_flag=None):
-    """Convert text to speech audio"""
-    try:
-        # skip if already interrupted
-        if interrupted_flag and interrupted_flag():
+# async client on a single background event loop, used to synthesize
+# upcoming sentences concurrently while earlier ones are still playing
+async_groq_client = AsyncGroq(
+    api_key=GROQ_API_KEY,
+    http_client=httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        timeout=httpx.Timeout(30.0, connect=3.0)
+    )
+)
+_async_loop = asyncio.new_event_loop()
+threading.Thread(target=_async_loop.run_forever, name="groq-async", daemon=True).start()
+
+# static prefix of every LLM request - kept byte-identical so the provider can reuse its prompt cache
+_SYSTEM_PROMPT = """You are Jennifer, a helpful AI assistant for phone conversations.
+    
+Be warm, natural, and conversational. Keep responses concise and human-like.
+Use contractions and natural speech patterns.
+
+Always respond in JSON format: {"action": "respond" or "hangup", "text": "your response"}
+
+IMPORTANT: 
+- Always provide a text response, never return null or empty text.
+- If you don't know something, say so clearly instead of making things up.
+- If the user asks about "our website" or "our company", ask them to clarify what they're referring to.
+- Keep responses relevant to what the user actually asked.
+- If ending the call, still provide a polite goodbye message in the text field.
+
+Be helpful, ask for clarification when needed, and end calls naturally when appropriate."""
+_SYSTEM_MESSAGE = {"role": "system", "content": _SYSTEM_PROMPT}
+
+# replies (and their audio) to the first thing callers say, shared across calls
+RESPONSE_CACHE_SIZE = 512
+_response_cache = OrderedDict()
+_speech_cache = {}
+_cache_lock = threading.Lock()
+
+TTS_CHUNK_BYTES = 3200  # 200ms of 8kHz 16-bit audio
+
+def _response_cache_key(session, user_input):
+    """Cache key for the caller's first utterance, None after it"""
+    # only the first reply has a fixed context (the greeting), later ones depend on the call so far
+    if session.get_context():
+        return None
+    return user_input.lower().strip().rstrip('.!?')
+
+def _cache_response(key, response_json):
+    with _cache_lock:
+        _response_cache[key] = response_json
+        _response_cache.move_to_end(key)
+        if len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _, evicted = _response_cache.popitem(last=False)
+            _speech_cache.pop(evicted.get("text", ""), None)
+
+def _get_cached_response(key):
+    with _cache_lock:
+        response_json = _response_cache.get(key)
+        if response_json is None:
             return None
-            
-        tts_resp = groq_client.audio.speech.create(
-            input=text, 
-            voice=TTS_VOICE, 
+        _response_cache.move_to_end(key)
+        return dict(response_json)
+
+def _is_cached_reply(text):
+    with _cache_lock:
+        return any(response.get("text") == text for response in _response_cache.values())
+
+def _read_speech_stream(text, chunks, cancelled):
+    """Read a streaming TTS response into the chunks queue, then None; an exception is queued on failure"""
+    # the request slot is held only while the response is read, not while it plays
+    try:
+        with groq_requests.slot(), groq_client.audio.speech.with_streaming_response.create(
+            input=text,
+            voice=TTS_VOICE,
             model=TTS_MODEL,
-            response_format="wav", 
+            response_format="wav",
+            sample_rate=AUDIO_SAMPLE_RATE
+        ) as tts_resp:
+            groq_requests.update_from_headers(tts_resp.headers)
+            for data in tts_resp.iter_bytes(TTS_CHUNK_BYTES):
+                if cancelled.is_set():
+                    break
+                chunks.put(data)
+    except Exception as e:
+        groq_requests.record_error(e)
+        chunks.put(e)
+    finally:
+        chunks.put(None)
+
+def stream_speech(text, interrupted_flag=None):
+    """Convert text to speech audio, yielding PCM chunks as they are synthesized"""
+    # skip if already interrupted
+    if interrupted_flag and interrupted_flag():
+        return
+
+    cached_pcm = _speech_cache.get(text)
+    if cached_pcm:
+        yield cached_pcm
+        return
+
+    # keep the audio of cached replies so later calls skip TTS
+    kept_chunks = [] if _is_cached_reply(text) else None
+    chunks = queue.Queue()
+    cancelled = threading.Event()
+    threading.Thread(target=_read_speech_stream, args=(text, chunks, cancelled),
+                     name="tts-reader", daemon=True).start()
+    try:
+        buffer = bytearray()
+        data_offset = None
+        for data in iter(chunks.get, None):
+            if isinstance(data, Exception):
+                if "rate_limit_exceeded" in str(data):
+                    logging.warning(f"TTS rate limit hit: {data}")
+                else:
+                    logging.error(f"TTS failed: {data}", exc_info=data)
+                return
+            if interrupted_flag and interrupted_flag():
+                return
+            buffer.extend(data)
+
+            # strip the WAV header before passing PCM on
+            if data_offset is None:
+                data_offset = wav_data_offset(buffer)
+                if data_offset is None:
+                    continue
+                del buffer[:data_offset]
+
+            while len(buffer) >= TTS_CHUNK_BYTES:
+                chunk = bytes(buffer[:TTS_CHUNK_BYTES])
+                del buffer[:TTS_CHUNK_BYTES]
+                if kept_chunks is not None:
+                    kept_chunks.append(chunk)
+                yield chunk
+
+        # last partial chunk, trimmed to whole samples
+        chunk = bytes(buffer[:len(buffer) & ~1])
+        if chunk and data_offset is not None:
+            if kept_chunks is not None:
+                kept_chunks.append(chunk)
+            yield chunk
+    finally:
+        # stops the reader if playback ends early (interruption or abandoned generator)
+        cancelled.set()
+
+    if kept_chunks:
+        with _cache_lock:
+            _speech_cache[text] = b"".join(kept_chunks)
+
+async def _synthesize_speech_async(text):
+    cached_pcm = _speech_cache.get(text)
+    if cached_pcm:
+        return cached_pcm
+
+    await groq_requests.acquire_async()
+    try:
+        tts_resp = await async_groq_client.audio.speech.create(
+            input=text,
+            voice=TTS_VOICE,
+            model=TTS_MODEL,
+            response_format="wav",
             sample_rate=AUDIO_SAMPLE_RATE
         )
-        
-        if interrupted_flag and interrupted_flag():
-            return None
-            
-        # extract PCM data from WAV response
-        with io.BytesIO(tts_resp.read()) as audio_io, wave.open(audio_io, 'rb') as wav_file:
-            return wav_file.readframes(wav_file.getnframes())
+        groq_requests.update_from_headers(tts_resp.headers)
+        wav_data = await tts_resp.read()
     except Exception as e:
+        groq_requests.record_error(e)
         if "rate_limit_exceeded" in str(e):
             logging.warning(f"TTS rate limit hit: {e}")
         else:
             logging.error(f"TTS failed: {e}", exc_info=True)
         return None
+    finally:
+        groq_requests.release()
+
+    data_offset = wav_data_offset(wav_data)
+    if data_offset is None:
+        return None
+    return wav_data[data_offset:data_offset + ((len(wav_data) - data_offset) & ~1)]
+
+def prefetch_speech(text):
+    """Start synthesizing text in the background, returns a Future of its PCM audio"""
+    return asyncio.run_coroutine_threadsafe(_synthesize_speech_async(text), _async_loop)
+
+def synthesize_speech(text, interrupted_flag=None):
+    """Convert text to speech audio"""
+    pcm = b"".join(stream_speech(text, interrupted_flag))
+    if not pcm or (interrupted_flag and interrupted_flag()):
+        return None
+    return pcm
+
+# phrases Whisper tends to hallucinate on silence/noise, matched in a single pass
+_HALLUCINATIONS = [
+    "thank you for calling",
+    "how may i help you today",
+    "is there anything else i can help you with",
+    "have a great day and thank you for calling",
+    "end of call",
+    "call ended",
+    "system message",
+    "automated response"
+]
+_HALLUCINATION_RE = re.compile("|".join(re.escape(phrase) for phrase in _HALLUCINATIONS), re.IGNORECASE)
 
 def transcribe_audio(audio_data):
     """Convert speech audio to text"""
@@ -53,27 +242,19 @@ def transcribe_audio(audio_data):
             "Be accurate and natural. If unclear or just noise, return empty string."
         )
         
-        stt_resp = groq_client.audio.transcriptions.create(
-            file=audio_file, 
-            model=STT_MODEL,
-            prompt=stt_prompt
-        )
+        with groq_requests.slot():
+            raw_resp = groq_client.audio.transcriptions.with_raw_response.create(
+                file=audio_file, 
+                model=STT_MODEL,
+                prompt=stt_prompt
+            )
+        groq_requests.update_from_headers(raw_resp.headers)
+        stt_resp = raw_resp.parse()
         user_text = stt_resp.text.strip()
         
         # filter out common Whisper hallucinations
         if user_text:
-            hallucinations = [
-                "thank you for calling",
-                "how may i help you today",
-                "is there anything else i can help you with",
-                "have a great day and thank you for calling",
-                "end of call",
-                "call ended",
-                "system message",
-                "automated response"
-            ]
-            
-            if any(phrase in user_text.lower() for phrase in hallucinations):
+            if _HALLUCINATION_RE.search(user_text):
                 logging.warning(f"Potential STT hallucination detected: '{user_text}'")
                 return ""
             
@@ -83,47 +264,125 @@ def transcribe_audio(audio_data):
         
         return user_text
     except Exception as e:
+        groq_requests.record_error(e)
         logging.error(f"STT failed: {e}", exc_info=True)
         return ""
 
-def generate_response(session, user_input):
-    """Generate AI response to user input"""
-    session.add_exchange(user_input, "")
+# "text" field of the JSON reply and the sentence endings within it
+_TEXT_FIELD_RE = re.compile(r'"text"\s*:\s*"')
+_SENTENCE_END_RE = re.compile(r'[.!?]+(?=\s)')
 
-    system_prompt = """You are Jennifer, a helpful AI assistant for phone conversations.
-    
-Be warm, natural, and conversational. Keep responses concise and human-like.
-Use contractions and natural speech patterns.
+def _partial_reply_text(response_text):
+    """Decode the "text" field of a partial JSON reply, returns (text, complete)"""
+    match = _TEXT_FIELD_RE.search(response_text)
+    if not match:
+        return "", False
 
-Always respond in JSON format: {"action": "respond" or "hangup", "text": "your response"}
+    chars = []
+    i = match.end()
+    while i < len(response_text):
+        char = response_text[i]
+        if char == '"':
+            return "".join(chars), True
+        if char == '\\':
+            escape_len = 6 if response_text[i + 1:i + 2] == 'u' else 2
+            escape = response_text[i:i + escape_len]
+            if len(escape) < escape_len:
+                break  # rest of the escape hasn't arrived yet
+            chars.append(json.loads(f'"{escape}"'))
+            i += escape_len
+            continue
+        chars.append(char)
+        i += 1
+    return "".join(chars), False
 
-IMPORTANT: 
-- Always provide a text response, never return null or empty text.
-- If you don't know something, say so clearly instead of making things up.
-- If the user asks about "our website" or "our company", ask them to clarify what they're referring to.
-- Keep responses relevant to what the user actually asked.
-- If ending the call, still provide a polite goodbye message in the text field.
+def _stream_completion(messages, on_sentence):
+    """Stream the LLM reply, passing each finished sentence of its text to on_sentence"""
+    with groq_requests.slot():
+        raw_resp = groq_client.chat.completions.with_raw_response.create(
+            model=LLM_MODEL,
+            messages=messages,
+            temperature=0.8,
+            max_tokens=200,
+            response_format={"type": "json_object"},
+            stream=True
+        )
+        groq_requests.update_from_headers(raw_resp.headers)
 
-Be helpful, ask for clarification when needed, and end calls naturally when appropriate."""
+        response_text = ""
+        spoken = 0
+        for chunk in raw_resp.parse():
+            if not chunk.choices:
+                continue
+            response_text += chunk.choices[0].delta.content or ""
+
+            reply_text, complete = _partial_reply_text(response_text)
+            end = spoken
+            if complete:
+                end = len(reply_text)
+            else:
+                for match in _SENTENCE_END_RE.finditer(reply_text, spoken):
+                    end = match.end()
+
+            if end > spoken:
+                sentence = reply_text[spoken:end].strip()
+                spoken = end
+                if sentence:
+                    on_sentence(sentence)
+    return response_text
+
+def generate_response(session, user_input, on_sentence=None):
+    """Generate AI response to user input, streaming finished sentences to on_sentence if given"""
+    cache_key = _response_cache_key(session, user_input)
+    if cache_key:
+        cached = _get_cached_response(cache_key)
+        if cached:
+            session.add_exchange(user_input, cached.get("text", ""))
+            if on_sentence and cached.get("text"):
+                on_sentence(cached["text"])
+            return cached
 
     messages = [
-        {"role": "system", "content": system_prompt},
+        _SYSTEM_MESSAGE,
         *session.get_context(),
         {"role": "user", "content": user_input}
     ]
 
+    # sentences already handed to on_sentence, so a failure mid-reply isn't followed by an apology
+    spoken_sentences = []
+    def speak_sentence(sentence):
+        spoken_sentences.append(sentence)
+        on_sentence(sentence)
+
     try:
-        response = groq_client.chat.completions.create(
-            model=LLM_MODEL, 
-            messages=messages, 
-            temperature=0.8,
-            max_tokens=200, 
-            response_format={"type": "json_object"}
-        )
-        response_text = response.choices[0].message.content
+        if on_sentence:
+            response_text = _stream_completion(messages, speak_sentence)
+        else:
+            with groq_requests.slot():
+                raw_resp = groq_client.chat.completions.with_raw_response.create(
+                    model=LLM_MODEL, 
+                    messages=messages, 
+                    temperature=0.8,
+                    max_tokens=200, 
+                    response_format={"type": "json_object"}
+                )
+            groq_requests.update_from_headers(raw_resp.headers)
+            response = raw_resp.parse()
+            response_text = response.choices[0].message.content
         response_json = json.loads(response_text)
         session.add_exchange(user_input, response_json.get("text", ""))
+        if cache_key and response_json.get("text"):
+            _cache_response(cache_key, dict(response_json))
         return response_json
     except Exception as e:
+        groq_requests.record_error(e)
         logging.error(f"LLM failed: {e}", exc_info=True)
-        return {"action": "respond", "text": "Sorry, could you repeat that?"}
\ No newline at end of file
+        if spoken_sentences:
+            partial_text = " ".join(spoken_sentences)
+            session.add_exchange(user_input, partial_text)
+            return {"action": "respond", "text": partial_text}
+        session.add_exchange(user_input, "")
+        fallback = {"action": "respond", "text": "Sorry, could you repeat that?"}
+        if on_sentence:
+            on_sentence(fallback["text"])
+        return fallback
\ No newline at end of file
@@ -1,52 +1,162 @@
-import base64
-import io
-import wave
+import binascii
+import struct
 import logging
+import warnings
 import numpy as np
+from config import AUDIO_SAMPLE_RATE
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop
+except ImportError:
+    # audioop was removed in Python 3.13, fall back to NumPy
+    audioop = None
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional, the NumPy encoder/decoder are used without it
+    njit = None
+
+# what rms_level raises on a malformed frame
+RMS_LEVEL_ERRORS = (audioop.error, ValueError) if audioop else (ValueError,)
+
+# RMS level of a 16-bit PCM frame (0.0 to 1.0)
+def rms_level(frame):
+    if audioop:
+        return audioop.rms(frame, 2) / 32768.0
+    samples = np.frombuffer(frame, dtype=np.int16)
+    if njit:
+        return _rms_kernel(samples) / 32768.0
+    return float(np.sqrt(np.mean(samples.astype(np.float32) ** 2))) / 32768.0
+
+# mu-law exponent (segment) of a biased magnitude, indexed by its top 8 bits
+_ULAW_EXP_LUT = np.array([0, 0] + [exp for exp in range(1, 8) for _ in range(1 << exp)], dtype=np.int32)
 
 # Convert PCM audio to mu-law format (Twilio expects mu-law)
 def pcm_to_ulaw(pcm_data):
-    samples = np.frombuffer(pcm_data, dtype=np.int16).copy()
-    np.clip(samples, -32767, 32767, out=samples)
-    
-    ulaw = bytearray(len(samples))
-    for i, sample in enumerate(samples):
-        sign = 0x80 if sample < 0 else 0
-        sample_abs = abs(sample)
-        
-        if sample_abs > 32635:
-            sample_abs = 32635
-        
-        # find exponent
-        exponent = 7
-        mask = 0x4000
-        while (sample_abs & mask) == 0 and exponent > 0:
-            exponent -= 1
-            mask >>= 1
-        
-        mantissa = (sample_abs >> (exponent + 3)) & 0x0F
-        ulaw_byte = (sign | (exponent << 4) | mantissa) ^ 0xFF
-        ulaw[i] = ulaw_byte
-    
-    return bytes(ulaw)
+    if audioop:
+        return audioop.lin2ulaw(pcm_data, 2)
+    if njit:
+        samples = np.frombuffer(pcm_data, dtype=np.int16)
+        ulaw = np.empty(len(samples), dtype=np.uint8)
+        _pcm_to_ulaw_kernel(samples, ulaw)
+        return ulaw.tobytes()
+    return _pcm_to_ulaw_numpy(pcm_data)
+
+if njit:
+    # compiled per-sample encoder, same algorithm as the NumPy version
+    @njit(cache=True, boundscheck=False)
+    def _pcm_to_ulaw_kernel(samples, out):
+        for i in range(samples.shape[0]):
+            sample = np.int32(samples[i])
+            sign = 0x80 if sample < 0 else 0
+            sample_abs = min(abs(sample), 32635) + 0x84
+
+            exponent = _ULAW_EXP_LUT[sample_abs >> 7]
+
+            mantissa = (sample_abs >> (exponent + 3)) & 0x0F
+            out[i] = (sign | (exponent << 4) | mantissa) ^ 0xFF
+
+def _pcm_to_ulaw_numpy(pcm_data):
+    samples = np.frombuffer(pcm_data, dtype=np.int16).astype(np.int32)
+
+    sign = (samples >> 8) & 0x80
+    magnitude = np.minimum(np.abs(samples), 32635) + 0x84
+
+    exponent = _ULAW_EXP_LUT[magnitude >> 7]
+
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    ulaw = ~(sign | (exponent << 4) | mantissa) & 0xFF
+    return ulaw.astype(np.uint8).tobytes()
+
+# 44-byte RIFF header for mono 16-bit PCM, sizes are patched per request
+_WAV_HEADER_FORMAT = '<4sI4s4sIHHIIHH4sI'
+_WAV_HEADER_TEMPLATE = struct.pack(
+    _WAV_HEADER_FORMAT,
+    b'RIFF', 0, b'WAVE',
+    b'fmt ', 16, 1, 1, AUDIO_SAMPLE_RATE, AUDIO_SAMPLE_RATE * 2, 2, 16,
+    b'data', 0
+)
 
 # Wrap raw PCM data in WAV format for Whisper
 def create_wav_bytes(audio_data, sample_rate):
     try:
-        wav_buffer = io.BytesIO()
-        with wave.open(wav_buffer, 'wb') as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(sample_rate)
-            wf.writeframes(audio_data)
-        return wav_buffer.getvalue()
+        if sample_rate == AUDIO_SAMPLE_RATE:
+            header = bytearray(_WAV_HEADER_TEMPLATE)
+            struct.pack_into('<I', header, 4, len(audio_data) + 36)
+            struct.pack_into('<I', header, 40, len(audio_data))
+        else:
+            header = struct.pack(
+                _WAV_HEADER_FORMAT,
+                b'RIFF', len(audio_data) + 36, b'WAVE',
+                b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+                b'data', len(audio_data)
+            )
+        return b"".join((header, audio_data))
     except Exception as e:
         logging.error(f"WAV creation failed: {e}")
         return None
 
-# Decode mu-law audio from Twilio to PCM
-def decode_mulaw(payload):
-    # mu-law to linear PCM lookup table
-    _ulaw2lin = np.array([-32124,-31100,-30076,-29052,-28028,-27004,-25980,-24956,-23932,-22908,-21884,-20860,-19836,-18812,-17788,-16764,-15996,-15484,-14972,-14460,-13948,-13436,-12924,-12412,-11900,-11388,-10876,-10364,-9852,-9340,-8828,-8316,-7932,-7676,-7420,-7164,-6908,-6652,-6396,-6140,-5884,-5628,-5372,-5116,-4860,-4604,-4348,-4092,-3900,-3772,-3644,-3516,-3388,-3260,-3132,-3004,-2876,-2748,-2620,-2492,-2364,-2236,-2108,-1980,-1884,-1820,-1756,-1692,-1628,-1564,-1500,-1436,-1372,-1308,-1244,-1180,-1116,-1052,-988,-924,-876,-844,-812,-780,-748,-716,-684,-652,-620,-588,-556,-524,-492,-460,-428,-396,-372,-356,-340,-324,-308,-292,-276,-260,-244,-228,-212,-196,-180,-164,-148,-132,-128,-120,-112,-104,-96,-88,-80,-72,-64,-56,-48,-40,-32,-24,-16,-8,0,32124,31100,30076,29052,28028,27004,25980,24956,23932,22908,21884,20860,19836,18812,17788,16764,15996,15484,14972,14460,13948,13436,12924,12412,11900,11388,10876,10364,9852,9340,8828,8316,7932,7676,7420,7164,6908,6652,6396,6140,5884,5628,5372,5116,4860,4604,4348,4092,3900,3772,3644,3516,3388,3260,3132,3004,2876,2748,2620,2492,2364,2236,2108,1980,1884,1820,1756,1692,1628,1564,1500,1436,1372,1308,1244,1180,1116,1052,988,924,876,844,812,780,748,716,684,652,620,588,556,524,492,460,428,396,372,356,340,324,308,292,276,260,244,228,212,196,-180,-164,-148,-132,-128,-120,-112,-104,-96,-88,-80,-72,-64,-56,-48,-40,-32,-24,-16,-8,0], dtype=np.int16)
-    ulaw_data = np.frombuffer(base64.b64decode(payload), dtype=np.uint8)
-    return _ulaw2lin[ulaw_data].tobytes()
\ No newline at end of file
+# Find where PCM samples start in a WAV stream, None until the header is complete
+def wav_data_offset(wav_data):
+    offset = 12  # skip RIFF/WAVE header
+    while offset + 8 <= len(wav_data):
+        chunk_id, chunk_size = struct.unpack_from('<4sI', wav_data, offset)
+        if chunk_id == b'data':
+            return offset + 8
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+# mu-law to linear PCM lookup table
+_ULAW2LIN = np.array([
+    -32124,-31100,-30076,-29052,-28028,-27004,-25980,-24956,-23932,-22908,-21884,-20860,-19836,-18812,-17788,-16764,
+    -15996,-15484,-14972,-14460,-13948,-13436,-12924,-12412,-11900,-11388,-10876,-10364,-9852,-9340,-8828,-8316,
+    -7932,-7676,-7420,-7164,-6908,-6652,-6396,-6140,-5884,-5628,-5372,-5116,-4860,-4604,-4348,-4092,
+    -3900,-3772,-3644,-3516,-3388,-3260,-3132,-3004,-2876,-2748,-2620,-2492,-2364,-2236,-2108,-1980,
+    -1884,-1820,-1756,-1692,-1628,-1564,-1500,-1436,-1372,-1308,-1244,-1180,-1116,-1052,-988,-924,
+    -876,-844,-812,-780,-748,-716,-684,-652,-620,-588,-556,-524,-492,-460,-428,-396,
+    -372,-356,-340,-324,-308,-292,-276,-260,-244,-228,-212,-196,-180,-164,-148,-132,
+    -120,-112,-104,-96,-88,-80,-72,-64,-56,-48,-40,-32,-24,-16,-8,0,
+    32124,31100,30076,29052,28028,27004,25980,24956,23932,22908,21884,20860,19836,18812,17788,16764,
+    15996,15484,14972,14460,13948,13436,12924,12412,11900,11388,10876,10364,9852,9340,8828,8316,
+    7932,7676,7420,7164,6908,6652,6396,6140,5884,5628,5372,5116,4860,4604,4348,4092,
+    3900,3772,3644,3516,3388,3260,3132,3004,2876,2748,2620,2492,2364,2236,2108,1980,
+    1884,1820,1756,1692,1628,1564,1500,1436,1372,1308,1244,1180,1116,1052,988,924,
+    876,844,812,780,748,716,684,652,620,588,556,524,492,460,428,396,
+    372,356,340,324,308,292,276,260,244,228,212,196,180,164,148,132,
+    120,112,104,96,88,80,72,64,56,48,40,32,24,16,8,0
+], dtype=np.int16)
+
+# Decode mu-law audio from Twilio to an int16 PCM sample array
+def decode_mulaw_ndarray(payload):
+    if audioop:
+        return np.frombuffer(audioop.ulaw2lin(binascii.a2b_base64(payload), 2), dtype=np.int16)
+
+    ulaw_data = np.frombuffer(binascii.a2b_base64(payload), dtype=np.uint8)
+    if njit:
+        samples = np.empty(len(ulaw_data), dtype=np.int16)
+        _decode_mulaw_kernel(ulaw_data, samples)
+        return samples
+    return _ULAW2LIN[ulaw_data]
+
+if njit:
+    # compiled table decode and RMS for the per-frame inbound path
+    @njit(cache=True, boundscheck=False)
+    def _decode_mulaw_kernel(ulaw_data, out):
+        for i in range(ulaw_data.shape[0]):
+            out[i] = _ULAW2LIN[ulaw_data[i]]
+
+    @njit(cache=True, boundscheck=False)
+    def _rms_kernel(samples):
+        total = 0.0
+        for i in range(samples.shape[0]):
+            total += float(samples[i]) * samples[i]
+        return np.sqrt(total / samples.shape[0]) if samples.shape[0] else 0.0
+
+    # compile (or load from cache) at import, not on the first call's audio
+    _warmup = np.zeros(160, dtype=np.int16)
+    _pcm_to_ulaw_kernel(_warmup, np.empty(160, dtype=np.uint8))
+    _decode_mulaw_kernel(np.full(160, 0xFF, dtype=np.uint8), _warmup)
+    _rms_kernel(_warmup)
\ No newline at end of file
@@ -1,4 +1,5 @@
 import os
+import re
 import logging
 
 logging.basicConfig(
@@ -7,6 +8,12 @@ logging.basicConfig(
     datefmt='%H:%M:%S'
 )
 
+# KEY=value lines of a .env file (LF or CRLF), value optionally wrapped in matching quotes
+_ENV_LINE_RE = re.compile(
+    r'^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(?:"([^"\r\n]*)"|\'([^\'\r\n]*)\'|([^\r\n]*?))[ \t\r]*$',
+    re.MULTILINE
+)
+
 # Load environment variables
 try:
     from dotenv import load_dotenv
@@ -16,11 +23,11 @@ except ImportError:
     env_path = '.env'
     if os.path.exists(env_path):
         with open(env_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip().strip('"').strip("'")
+            env_entries = _ENV_LINE_RE.findall(f.read())
+        os.environ.update(
+            (key, double_quoted or single_quoted or bare)
+            for key, double_quoted, single_quoted, bare in env_entries
+        )
 
 # API credentials
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
@@ -41,6 +48,11 @@ AUDIO_SAMPLE_RATE = 8000
 VAD_FRAME_MS = 20
 VAD_AGGRESSIVENESS = 1  # 1-3, higher = more aggressive
 MIN_AUDIO_LEVEL_THRESHOLD = 0.015
+AUDIO_THREAD_NICE = -5  # audio thread priority, lowering it needs CAP_SYS_NICE
+
+# Interruption (barge-in) detection
+INTERRUPTION_MIN_SPEECH_FRAMES = 2  # consecutive speech frames before the agent stops
+INTERRUPTION_NOISE_RATIO = 2.0  # speech must be this much louder than the line noise floor
 
 # Timing thresholds
 VAD_SILENCE_MS = 600  # silence before ending utterance
@@ -49,9 +61,16 @@ ECHO_CANCELLATION_MS = 100  # ignore echo from agent
 AGENT_RESPONSE_DELAY_MS = 100  # pause before responding
 MAX_UTTERANCE_LENGTH_MS = 10000
 MIN_MEANINGFUL_WORDS = 2
+MAX_HISTORY_EXCHANGES = 10  # conversation turns kept as LLM context
 
 # Call limits
 MAX_CALL_DURATION_S = 600  # 10 minutes
 MAX_CONCURRENT_CALLS = 5
 RATE_LIMIT_WINDOW_MINUTES = 1
-RATE_LIMIT_CALLS_PER_WINDOW = 10
\ No newline at end of file
+RATE_LIMIT_CALLS_PER_WINDOW = 10
+RATE_LIMIT_MAX_TRACKED_CALLERS = 10000  # oldest callers are forgotten beyond this
+
+# Groq request throttling
+GROQ_MAX_CONCURRENT_REQUESTS = 8  # in-flight STT/LLM/TTS requests across all calls
+GROQ_MIN_REMAINING_REQUESTS = 1  # pause until reset when the budget drops this low
+GROQ_MIN_REMAINING_TOKENS = 1000
\ No newline at end of file
@@ -1,33 +1,52 @@
 import time
 import threading
-from collections import defaultdict, deque
-from config import MAX_CONCURRENT_CALLS, RATE_LIMIT_WINDOW_MINUTES, RATE_LIMIT_CALLS_PER_WINDOW
+from array import array
+from collections import OrderedDict
+from config import (MAX_CONCURRENT_CALLS, RATE_LIMIT_WINDOW_MINUTES, RATE_LIMIT_CALLS_PER_WINDOW,
+                    RATE_LIMIT_MAX_TRACKED_CALLERS)
+
+LOCK_STRIPES = 32
 
 class RateLimiter:
     def __init__(self):
         self.active_calls = 0
-        self.call_timestamps = defaultdict(lambda: deque())
         self.lock = threading.Lock()
+        # per-caller history is spread over independently locked stripes,
+        # each mapping caller_id -> (ring buffer of recent call times, next write index)
+        # with the least recent caller first
+        self.stripes = [(threading.Lock(), OrderedDict()) for _ in range(LOCK_STRIPES)]
+        self.max_callers_per_stripe = -(-RATE_LIMIT_MAX_TRACKED_CALLERS // LOCK_STRIPES)
     
     def can_start_call(self, caller_id="default"):
-        with self.lock:
-            # check concurrent call limit
-            if self.active_calls >= MAX_CONCURRENT_CALLS:
-                return False
+        stripe_lock, call_timestamps = self.stripes[hash(caller_id) % LOCK_STRIPES]
+        with stripe_lock:
+            # check per-caller rate limit - the slot about to be overwritten
+            # holds the oldest of the caller's last N calls
+            now = time.monotonic()
+            window = RATE_LIMIT_WINDOW_MINUTES * 60
             
-            # check per-caller rate limit
-            now = time.time()
-            window_start = now - (RATE_LIMIT_WINDOW_MINUTES * 60)
+            entry = call_timestamps.get(caller_id)
+            if entry is None:
+                entry = (array('d', [-window] * RATE_LIMIT_CALLS_PER_WINDOW), 0)
+            timestamps, index = entry
+            call_timestamps[caller_id] = entry
+            call_timestamps.move_to_end(caller_id)
             
-            timestamps = self.call_timestamps[caller_id]
-            while timestamps and timestamps[0] < window_start:
-                timestamps.popleft()
+            # forget the least recent callers so the table stays bounded
+            while len(call_timestamps) > self.max_callers_per_stripe:
+                call_timestamps.popitem(last=False)
             
-            if len(timestamps) >= RATE_LIMIT_CALLS_PER_WINDOW:
+            if now - timestamps[index] < window:
                 return False
             
-            self.active_calls += 1
-            timestamps.append(now)
+            # check concurrent call limit
+            with self.lock:
+                if self.active_calls >= MAX_CONCURRENT_CALLS:
+                    return False
+                self.active_calls += 1
+            
+            timestamps[index] = now
+            call_timestamps[caller_id] = (timestamps, (index + 1) % RATE_LIMIT_CALLS_PER_WINDOW)
             return True
     
     def end_call(self):
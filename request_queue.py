@@ -0,0 +1,85 @@
+import re
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from config import GROQ_MAX_CONCURRENT_REQUESTS, GROQ_MIN_REMAINING_REQUESTS, GROQ_MIN_REMAINING_TOKENS
+
+# Groq reset durations look like "2m59.56s", "7.66s" or "120ms"
+_DURATION_RE = re.compile(r'(?:(\d+)h)?(?:(\d+)m(?!s))?(?:([\d.]+)s)?(?:([\d.]+)ms)?$')
+
+def _parse_duration(value):
+    """Seconds in a Groq reset/retry header, 0.0 if missing or unparseable"""
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    match = _DURATION_RE.match(value.strip())
+    if not match:
+        return 0.0
+    hours, minutes, seconds, millis = (float(part) if part else 0.0 for part in match.groups())
+    return hours * 3600 + minutes * 60 + seconds + millis / 1000
+
+class GroqRequestQueue:
+    """Caps concurrent Groq requests and pauses before the account rate limit is hit"""
+
+    def __init__(self):
+        self.semaphore = threading.BoundedSemaphore(GROQ_MAX_CONCURRENT_REQUESTS)
+        self.lock = threading.Lock()
+        self.resume_at = 0.0  # monotonic time before which no new request is sent
+
+    def wait_for_budget(self):
+        delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    @contextmanager
+    def slot(self):
+        self.wait_for_budget()
+        with self.semaphore:
+            yield
+
+    async def acquire_async(self):
+        # polls instead of blocking so a cancelled task never leaks a slot
+        while True:
+            delay = self.resume_at - time.monotonic()
+            await asyncio.sleep(max(delay, 0))
+            if self.semaphore.acquire(blocking=False):
+                return
+            await asyncio.sleep(0.02)
+
+    def release(self):
+        self.semaphore.release()
+
+    def pause_for(self, seconds, reason):
+        if seconds <= 0:
+            return
+        with self.lock:
+            resume_at = time.monotonic() + seconds
+            if resume_at > self.resume_at:
+                self.resume_at = resume_at
+                logging.warning(f"Throttling Groq requests for {seconds:.2f}s ({reason})")
+
+    def update_from_headers(self, headers):
+        """Pause ahead of time when x-ratelimit-remaining-* shows the budget nearly spent"""
+        try:
+            remaining_requests = int(headers.get("x-ratelimit-remaining-requests", GROQ_MIN_REMAINING_REQUESTS + 1))
+            remaining_tokens = int(headers.get("x-ratelimit-remaining-tokens", GROQ_MIN_REMAINING_TOKENS + 1))
+        except ValueError:
+            return
+
+        if remaining_requests <= GROQ_MIN_REMAINING_REQUESTS:
+            self.pause_for(_parse_duration(headers.get("x-ratelimit-reset-requests")), "request budget low")
+        if remaining_tokens <= GROQ_MIN_REMAINING_TOKENS:
+            self.pause_for(_parse_duration(headers.get("x-ratelimit-reset-tokens")), "token budget low")
+
+    def record_error(self, error):
+        """Honour retry-after when a request was rate limited anyway"""
+        response = getattr(error, "response", None)
+        if response is not None and response.status_code == 429:
+            self.pause_for(_parse_duration(response.headers.get("retry-after")) or 1.0, "rate limited")
+
+groq_requests = GroqRequestQueue()
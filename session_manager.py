@@ -1,8 +1,9 @@
 import time
 import threading
+from collections import deque
 from dataclasses import dataclass, field
-from typing import List, Dict, Literal
-from config import MAX_CALL_DURATION_S
+from typing import Deque, Dict, Literal, Tuple
+from config import MAX_CALL_DURATION_S, MAX_HISTORY_EXCHANGES
 
 AgentState = Literal["LISTENING", "THINKING", "SPEAKING"]
 
@@ -12,9 +13,12 @@ class CallSession:
     from_number: str = ""
     to_number: str = ""
     start_time: float = field(default_factory=time.time)
-    conversation_history: List[Dict] = field(default_factory=list)
+    # user + assistant message per exchange, oldest dropped automatically
+    conversation_history: Deque[Dict] = field(default_factory=lambda: deque(maxlen=MAX_HISTORY_EXCHANGES * 2))
     agent_state: AgentState = "LISTENING"
     lock: threading.Lock = field(default_factory=threading.Lock)
+    # immutable copy of the history for lock-free reads, replaced on every write
+    _history_snapshot: Tuple[Dict, ...] = field(default=(), init=False, repr=False)
 
     @property
     def duration(self) -> float:
@@ -30,13 +34,10 @@ class CallSession:
             self.conversation_history.append({"role": "user", "content": user_input})
             if agent_response:
                 self.conversation_history.append({"role": "assistant", "content": agent_response})
-            # keep last 10 exchanges only
-            if len(self.conversation_history) > 10:
-                self.conversation_history = self.conversation_history[-10:]
+            self._history_snapshot = tuple(self.conversation_history)
 
-    def get_context(self) -> List[Dict]:
-        with self.lock:
-            return list(self.conversation_history)
+    def get_context(self) -> Tuple[Dict, ...]:
+        return self._history_snapshot
 
     def should_end(self) -> bool:
         return self.duration >= MAX_CALL_DURATION_S
\ No newline at end of file
@@ -1,9 +1,14 @@
+import collections
+import concurrent.futures
+import itertools
 import json
 import logging
+import os
 import queue
 import threading
 import time
 import base64
+import binascii
 import numpy as np
 from twilio.twiml.voice_response import VoiceResponse, Connect
 import webrtcvad
@@ -11,11 +16,62 @@ import webrtcvad
 from config import (SERVER_URL, VAD_AGGRESSIVENESS, VAD_SILENCE_MS, VAD_MIN_SPEECH_MS, 
                     AUDIO_SAMPLE_RATE, VAD_FRAME_MS, ECHO_CANCELLATION_MS, 
                     MIN_AUDIO_LEVEL_THRESHOLD, MAX_UTTERANCE_LENGTH_MS, 
-                    MIN_MEANINGFUL_WORDS, AGENT_RESPONSE_DELAY_MS)
+                    MIN_MEANINGFUL_WORDS, AGENT_RESPONSE_DELAY_MS, AUDIO_THREAD_NICE,
+                    INTERRUPTION_MIN_SPEECH_FRAMES, INTERRUPTION_NOISE_RATIO)
 from session_manager import CallSession
-from audio_utils import decode_mulaw, pcm_to_ulaw
-from ai_services import synthesize_speech, transcribe_audio, generate_response
+from audio_utils import decode_mulaw_ndarray, pcm_to_ulaw, rms_level, RMS_LEVEL_ERRORS
+from ai_services import (synthesize_speech, stream_speech, prefetch_speech,
+                         transcribe_audio, generate_response)
 from rate_limiter import rate_limiter
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    # orjson is optional, inbound messages parse the same with the stdlib
+    _loads = json.loads
+
+# the greeting is identical on every call, so it is synthesized once and reused
+GREETING = "Hello, this is Jennifer. How can I help you today?"
+GREETING_TTS_ATTEMPTS = 2
+GREETING_RETRY_BACKOFF_S = 30  # calls skip the greeting for this long after TTS fails
+_GREETING_PCM = None
+_greeting_future = None  # synthesis in progress, shared by calls starting meanwhile
+_greeting_retry_at = 0.0
+_greeting_lock = threading.Lock()
+
+def _get_greeting():
+    """Greeting PCM audio, synthesized on first use; None if TTS is failing"""
+    global _GREETING_PCM, _greeting_future, _greeting_retry_at
+    with _greeting_lock:
+        if _GREETING_PCM or time.monotonic() < _greeting_retry_at:
+            return _GREETING_PCM
+        future = _greeting_future
+        if future is None:
+            future = _greeting_future = concurrent.futures.Future()
+            synthesizing = True
+        else:
+            synthesizing = False
+    if not synthesizing:
+        return future.result()
+
+    # synthesize outside the lock so waiting calls never queue behind retries
+    pcm_audio = None
+    try:
+        for _ in range(GREETING_TTS_ATTEMPTS):
+            pcm_audio = synthesize_speech(GREETING)
+            if pcm_audio:
+                break
+    finally:
+        with _greeting_lock:
+            if pcm_audio:
+                _GREETING_PCM = pcm_audio
+            else:
+                _greeting_retry_at = time.monotonic() + GREETING_RETRY_BACKOFF_S
+            _greeting_future = None
+        future.set_result(pcm_audio)
+    return pcm_audio
+
 class AudioProcessor(threading.Thread):
     """Handles incoming audio, VAD, and outgoing audio streaming"""
     
@@ -31,59 +87,114 @@ class AudioProcessor(threading.Thread):
         self.vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
         self.vad_frame_ms = VAD_FRAME_MS
         self.frame_bytes = int(AUDIO_SAMPLE_RATE * 2 * (self.vad_frame_ms / 1000))
+        self.frame_samples = self.frame_bytes // 2
+        self.pending_samples = np.empty(0, dtype=np.int16)
         
         # state tracking
         self.last_agent_speech_time = 0
         self.utterance_start_time = None
         self.consecutive_speech_frames = 0
         self.consecutive_silence_frames = 0
+        self.interrupt_speech_frames = 0
+        self.noise_floor = 0.0  # running level of non-speech frames
         self.is_sending_audio = False
         self.stop_audio_transmission = False
+        
+        # outgoing messages only differ in their media payload, so the JSON is built once per call
+        stream_sid = json.dumps(session.call_sid)
+        self._media_prefix = '{"event": "media", "streamSid": %s, "media": {"payload": "' % stream_sid
+        self._media_suffix = '"}}'
+        self._mark_complete = json.dumps({"event": "mark", "streamSid": session.call_sid, "mark": {"name": "agent_speech_complete"}})
+        self._mark_stopped = json.dumps({"event": "mark", "streamSid": session.call_sid, "mark": {"name": "agent_speech_stopped"}})
+        self._clear_message = json.dumps({"event": "clear", "streamSid": session.call_sid})
+        # mu-law silence sent to flush Twilio's buffer on interruption
+        silence_payload = base64.b64encode(b'\xFF' * 160).decode('ascii')
+        self._silence_media_msg = self._media_prefix + silence_payload + self._media_suffix
 
     def stop(self):
         self.stop_event.set()
+        self.incoming_audio_queue.put(None)  # wake run() if it is blocked on the queue
+
+    def add_incoming_audio(self, payload):
+        self.incoming_audio_queue.put(payload)
 
-    def add_incoming_audio(self, pcm_bytes):
-        self.incoming_audio_queue.put(pcm_bytes)
+    def decode_frames(self, payload):
+        """Decode a base64 mu-law payload into VAD-sized PCM frames"""
+        pcm_samples = decode_mulaw_ndarray(payload)
+        frames = []
+        if len(self.pending_samples):
+            # complete the partial frame from the head of this payload,
+            # copying at most one frame instead of the whole payload
+            needed = self.frame_samples - len(self.pending_samples)
+            self.pending_samples = np.concatenate((self.pending_samples, pcm_samples[:needed]))
+            pcm_samples = pcm_samples[needed:]
+            if len(self.pending_samples) < self.frame_samples:
+                return frames
+            frames.append(self.pending_samples)
+        # frames are views of the decoded samples
+        frame_end = len(pcm_samples) - len(pcm_samples) % self.frame_samples
+        for start in range(0, frame_end, self.frame_samples):
+            frames.append(pcm_samples[start:start + self.frame_samples])
+        self.pending_samples = pcm_samples[frame_end:]
+        return frames
 
     def send_audio_to_twilio(self, pcm_bytes):
         """Stream audio to Twilio in small chunks for fast interruption"""
+        return self.send_audio_stream((pcm_bytes,))
+
+    def send_audio_stream(self, pcm_chunks, interrupt_cb=None):
+        """Stream PCM chunks to Twilio as they arrive, returns True if any audio was sent"""
+        sent_audio = False
         try:
             self.is_sending_audio = True
             self.stop_audio_transmission = False
             self.session.set_state("SPEAKING")
             self.last_agent_speech_time = time.time()
             
-            # use 10ms chunks so interruption detection is super fast
-            chunk_size = 160
-            ulaw_data = pcm_to_ulaw(pcm_bytes)
-            
-            for i in range(0, len(ulaw_data), chunk_size):
+            # 40ms chunks halve the websocket messages per second of speech while
+            # still checking for interruption every 20ms of wall time
+            chunk_size = 320
+            send_interval = 0.02
+            # pace sends against absolute deadlines so send time doesn't add drift
+            chunks_sent = 0
+            send_start = time.monotonic()
+            for pcm_chunk in pcm_chunks:
+                ulaw_data = memoryview(pcm_to_ulaw(pcm_chunk))
+                
+                for i in range(0, len(ulaw_data), chunk_size):
+                    # the caller can cancel playback too, e.g. when the reply is interrupted
+                    if interrupt_cb and interrupt_cb():
+                        self.stop_audio_transmission = True
+                    if self.stop_audio_transmission:
+                        break
+                        
+                    ulaw_payload = binascii.b2a_base64(ulaw_data[i:i + chunk_size], newline=False).decode('ascii')
+                    self.ws.send(self._media_prefix + ulaw_payload + self._media_suffix)
+                    sent_audio = True
+                    chunks_sent += 1
+                    now = time.monotonic()
+                    delay = send_start + chunks_sent * send_interval - now
+                    if delay < -send_interval:
+                        # fell behind (e.g. waiting on the next sentence), so restart pacing
+                        # from this send instead of bursting out the backlog of missed slots
+                        send_start = now - (chunks_sent - 1) * send_interval
+                        delay = send_interval
+                    if delay > 0.0005:
+                        time.sleep(delay)
+                
                 if self.stop_audio_transmission:
                     logging.info("Audio interrupted")
                     break
-                    
-                chunk = ulaw_data[i:i + chunk_size]
-                ulaw_payload = base64.b64encode(chunk).decode('utf-8')
-                message = {
-                    "event": "media", 
-                    "streamSid": self.session.call_sid, 
-                    "media": {"payload": ulaw_payload}
-                }
-                self.ws.send(json.dumps(message))
-                time.sleep(0.01)
             
-            if not self.stop_audio_transmission:
-                mark_message = {
-                    "event": "mark", 
-                    "streamSid": self.session.call_sid, 
-                    "mark": {"name": "agent_speech_complete"}
-                }
-                self.ws.send(json.dumps(mark_message))
+            if sent_audio and not self.stop_audio_transmission:
+                self.ws.send(self._mark_complete)
+            elif not sent_audio:
+                self.session.set_state("LISTENING")
             self.is_sending_audio = False
         except Exception as e:
             logging.warning(f"Audio send failed: {e}")
             self.is_sending_audio = False
+        return sent_audio
 
     def stop_speaking(self):
         """Immediately stop agent speech and clear Twilio's audio buffer"""
@@ -92,25 +203,12 @@ class AudioProcessor(threading.Thread):
             self.is_sending_audio = False
             
             # flush Twilio's buffer by sending multiple empty frames
-            empty_audio = base64.b64encode(b'\xFF' * 160).decode('utf-8')
             for _ in range(5):
-                stop_message = {
-                    "event": "media", 
-                    "streamSid": self.session.call_sid, 
-                    "media": {"payload": empty_audio}
-                }
-                self.ws.send(json.dumps(stop_message))
+                self.ws.send(self._silence_media_msg)
             
             # tell Twilio to clear its queue
-            clear_message = {"event": "clear", "streamSid": self.session.call_sid}
-            self.ws.send(json.dumps(clear_message))
-            
-            mark_message = {
-                "event": "mark", 
-                "streamSid": self.session.call_sid, 
-                "mark": {"name": "agent_speech_stopped"}
-            }
-            self.ws.send(json.dumps(mark_message))
+            self.ws.send(self._clear_message)
+            self.ws.send(self._mark_stopped)
             self.session.set_state("LISTENING")
             logging.info("Agent stopped")
         except Exception as e:
@@ -119,46 +217,100 @@ class AudioProcessor(threading.Thread):
     def calculate_audio_level(self, frame):
         """Calculate RMS audio level (0.0 to 1.0)"""
         try:
-            samples = np.frombuffer(frame, dtype=np.int16)
-            rms = np.sqrt(np.mean(samples.astype(np.float32) ** 2))
-            return rms / 32768.0
-        except:
+            return rms_level(frame)
+        except RMS_LEVEL_ERRORS:
             return 0.0
 
-    def is_meaningful_speech(self, frame):
-        """Check if frame contains actual speech (not just noise)"""
-        audio_level = self.calculate_audio_level(frame)
-        if audio_level < MIN_AUDIO_LEVEL_THRESHOLD:
-            return False
-        return self.vad.is_speech(frame, AUDIO_SAMPLE_RATE)
+    def classify_frames(self, frames):
+        """(is_speech, level) for each frame of a batch"""
+        # same level function whatever the batch size, so gating doesn't depend on arrival timing
+        levels = [self.calculate_audio_level(frame) for frame in frames]
+        # energy gate first so quiet frames never reach the VAD; webrtcvad counts
+        # samples from the byte length, so it is given a byte view of the frame
+        return [
+            (level >= MIN_AUDIO_LEVEL_THRESHOLD
+             and self.vad.is_speech(memoryview(frame).cast('B'), AUDIO_SAMPLE_RATE), level)
+            for frame, level in zip(frames, levels)
+        ]
+
+    def next_payloads(self, timeout):
+        """Wait for a payload, then take any others already queued; None once stopped"""
+        payload = self.incoming_audio_queue.get(timeout=timeout)
+        if payload is None:
+            return None
+        payloads = [payload]
+        # a backlog (e.g. after a GC pause) is decoded and classified as one batch
+        while True:
+            try:
+                payload = self.incoming_audio_queue.get_nowait()
+            except queue.Empty:
+                return payloads
+            if payload is None:
+                return payloads  # stop_event is already set, run() exits after this batch
+            payloads.append(payload)
+
+    def raise_priority(self):
+        """Run this thread ahead of the websocket and conversation threads where the OS allows"""
+        try:
+            # on Linux the priority of a single thread is set through its native id
+            current = os.getpriority(os.PRIO_PROCESS, threading.get_native_id())
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), min(current, AUDIO_THREAD_NICE))
+        except (AttributeError, OSError) as e:
+            logging.debug(f"Audio thread priority unchanged: {e}")
 
     def run(self):
         """Main audio processing loop"""
-        speech_buffer = bytearray()
+        self.raise_priority()
+        speech_frames = []  # joined once when the utterance ends
         is_currently_speech = False
         silence_started_at = None
         min_speech_frames = VAD_MIN_SPEECH_MS // self.vad_frame_ms
         pause_tolerance_frames = 0
         max_pause_tolerance_frames = 10
+        frames = collections.deque()
+        
+        # loop invariants bound once, this loop runs every 20ms of call audio
+        stop_is_set = self.stop_event.is_set
+        next_payloads = self.next_payloads
+        decode_frames = self.decode_frames
+        classify_frames = self.classify_frames
+        next_frame = frames.popleft
+        utterance_put = self.utterance_queue.put
+        session = self.session
 
-        while not self.stop_event.is_set():
+        while not stop_is_set():
             try:
-                frame = self.incoming_audio_queue.get(timeout=0.1)
+                # payloads are decoded here rather than on the websocket thread
+                if not frames:
+                    # block until audio arrives; while an utterance is open, time out to close it
+                    payloads = next_payloads(0.1 if is_currently_speech else None)
+                    if payloads is None:
+                        break
+                    batch = [frame for payload in payloads for frame in decode_frames(payload)]
+                    if not batch:
+                        continue
+                    frames.extend(zip(batch, classify_frames(batch)))
                 
-                time_since_agent_speech = (time.time() - self.last_agent_speech_time) * 1000
+                # one speech decision per frame, shared by interruption and utterance detection
+                frame, (is_speech, level) = next_frame()
+                now = time.time()
+                time_since_agent_speech = (now - self.last_agent_speech_time) * 1000
+                if not is_speech:
+                    self.noise_floor += 0.05 * (level - self.noise_floor)
                 
-                # check for user interruption - respond immediately
-                is_speech = self.is_meaningful_speech(frame)
-                if is_speech and self.session.agent_state == "SPEAKING":
-                    self.consecutive_speech_frames += 1
-                    if self.consecutive_speech_frames >= 1:  # instant detection
+                # check for user interruption - sustained speech clearly above the line noise,
+                # so a single click or burst of noise doesn't cut the agent off
+                if (is_speech and session.agent_state == "SPEAKING"
+                        and level > INTERRUPTION_NOISE_RATIO * self.noise_floor):
+                    self.interrupt_speech_frames += 1
+                    if self.interrupt_speech_frames >= INTERRUPTION_MIN_SPEECH_FRAMES:
                         logging.info("User interrupted")
                         self.stop_speaking()
                         if hasattr(self, 'call_logic_ref'):
                             self.call_logic_ref.handle_interruption()
-                        self.consecutive_speech_frames = 0
+                        self.interrupt_speech_frames = 0
                 else:
-                    self.consecutive_speech_frames = 0
+                    self.interrupt_speech_frames = 0
                 
                 # ignore echo from agent's own speech
                 if time_since_agent_speech < ECHO_CANCELLATION_MS:
@@ -171,9 +323,9 @@ class AudioProcessor(threading.Thread):
                     pause_tolerance_frames = 0
                     
                     if not is_currently_speech:
-                        self.utterance_start_time = time.time()
+                        self.utterance_start_time = now
                     
-                    speech_buffer.extend(frame)
+                    speech_frames.append(frame)
                     is_currently_speech = True
                     silence_started_at = None
                 else:
@@ -184,21 +336,21 @@ class AudioProcessor(threading.Thread):
                         # tolerate brief pauses within utterance
                         if pause_tolerance_frames < max_pause_tolerance_frames:
                             pause_tolerance_frames += 1
-                            speech_buffer.extend(frame)
+                            speech_frames.append(frame)
                             continue
                         
                         if silence_started_at is None:
-                            silence_started_at = time.time()
+                            silence_started_at = now
                         
-                        silence_duration = (time.time() - silence_started_at) * 1000
-                        utterance_duration = (time.time() - self.utterance_start_time) * 1000 if self.utterance_start_time else 0
+                        silence_duration = (now - silence_started_at) * 1000
+                        utterance_duration = (now - self.utterance_start_time) * 1000 if self.utterance_start_time else 0
                         
                         # end utterance if silence is long enough or max length hit
                         if silence_duration > VAD_SILENCE_MS or utterance_duration > MAX_UTTERANCE_LENGTH_MS:
-                            if len(speech_buffer) / self.frame_bytes > min_speech_frames:
-                                self.utterance_queue.put(bytes(speech_buffer))
+                            if len(speech_frames) > min_speech_frames:
+                                utterance_put(b"".join(speech_frames))
                             
-                            speech_buffer.clear()
+                            speech_frames = []
                             is_currently_speech = False
                             silence_started_at = None
                             self.utterance_start_time = None
@@ -206,10 +358,10 @@ class AudioProcessor(threading.Thread):
                             
             except queue.Empty:
                 if is_currently_speech:
-                    if len(speech_buffer) / self.frame_bytes > min_speech_frames:
-                        self.utterance_queue.put(bytes(speech_buffer))
+                    if len(speech_frames) > min_speech_frames:
+                        utterance_put(b"".join(speech_frames))
                     
-                    speech_buffer.clear()
+                    speech_frames = []
                     is_currently_speech = False
                     silence_started_at = None
                     self.utterance_start_time = None
@@ -228,28 +380,130 @@ class CallLogic(threading.Thread):
         self.last_utterance_time = 0
         self.utterance_timeout = 3.0
         self.interrupted = False
+        # monotonic deadlines checked by run(), 0.0 when not set
+        self._interrupt_clear_at = 0.0
+        self._hangup_at = 0.0
 
     def stop(self):
         self.stop_event.set()
+        self.audio_processor.utterance_queue.put(None)  # wake run() if it is waiting for speech
 
     def handle_interruption(self):
         """Called when user interrupts agent"""
         self.interrupted = True
         self.session.set_state("LISTENING")
         logging.info("Handling interruption")
-        threading.Timer(0.1, lambda: setattr(self, 'interrupted', False)).start()
+        self._interrupt_clear_at = time.monotonic() + 0.1
+        self.audio_processor.utterance_queue.put(None)  # wake run() to pick up the deadline
+
+    def check_deadlines(self):
+        """Clear the interruption flag and hang up once their deadlines pass"""
+        now = time.monotonic()
+        if self._interrupt_clear_at and now >= self._interrupt_clear_at:
+            self.interrupted = False
+            self._interrupt_clear_at = 0.0
+        if self._hangup_at and now >= self._hangup_at:
+            self._hangup_at = 0.0
+            self.stop()
+
+    def wait_timeout(self):
+        """How long run() may block on the utterance queue"""
+        # wake often only while a held-back utterance is waiting to be sent,
+        # otherwise just often enough to enforce the max call duration
+        timeout = 0.1 if self.pending_utterance else 1.0
+        for deadline in (self._interrupt_clear_at, self._hangup_at):
+            if deadline:
+                timeout = min(timeout, max(deadline - time.monotonic(), 0.0))
+        return timeout
+
+    def sentence_audio(self, sentence):
+        """PCM chunks for a queued sentence, either streamed text or a prefetched synthesis"""
+        if isinstance(sentence, str):
+            yield from stream_speech(sentence, lambda: self.interrupted)
+        elif not self.interrupted:
+            pcm_audio = sentence.result()
+            if pcm_audio and not self.interrupted:
+                yield pcm_audio
+
+    def speak_sentences(self, sentences):
+        """Play sentences from the queue as they arrive until None, returns True if any audio was sent"""
+        first_sentence = sentences.get()
+        if first_sentence is None:
+            return False
+        
+        time.sleep(AGENT_RESPONSE_DELAY_MS / 1000.0)
+        if self.interrupted:
+            return False
+        
+        sentence_iter = itertools.chain([first_sentence], iter(sentences.get, None))
+        response_audio = (
+            pcm_chunk
+            for sentence in sentence_iter
+            for pcm_chunk in self.sentence_audio(sentence)
+        )
+        return self.audio_processor.send_audio_stream(response_audio, lambda: self.interrupted)
+
+    def respond(self, user_text):
+        """Generate a reply and speak it while the rest is still streaming from the LLM"""
+        sentences = queue.Queue()
+        result = {}
+        speaker = threading.Thread(target=lambda: result.update(spoke=self.speak_sentences(sentences)))
+        speaker.start()
+        
+        first_sentence = True
+        def queue_sentence(sentence):
+            # the first sentence streams straight into playback, later ones
+            # are synthesized ahead while the earlier ones are playing
+            nonlocal first_sentence
+            sentences.put(sentence if first_sentence else prefetch_speech(sentence))
+            first_sentence = False
+        
+        try:
+            response_json = generate_response(self.session, user_text, on_sentence=queue_sentence)
+        finally:
+            sentences.put(None)
+        speaker.join()
+        
+        # drop synthesis nobody will play (interrupted reply)
+        while not sentences.empty():
+            unplayed = sentences.get_nowait()
+            if unplayed is not None and not isinstance(unplayed, str):
+                unplayed.cancel()
+        return response_json, result.get("spoke", False)
+
+    def handle_response(self, response_json, spoke):
+        """Log the spoken reply, recover from interruption or TTS failure, and schedule hangup"""
+        if not response_json:
+            return
+        action = response_json.get("action", "respond")
+        text_to_speak = response_json.get("text", "").strip()
+        
+        if spoke:
+            logging.info(f"Agent: {text_to_speak}")
+        elif self.interrupted:
+            self.interrupted = False
+            self.session.set_state("LISTENING")
+        elif text_to_speak:
+            logging.warning("TTS failed, ending call")
+            self.stop()
+        
+        if action == "hangup":
+            logging.info("Ending call")
+            self._hangup_at = time.monotonic() + 3.0
 
     def run(self):
         """Main conversation loop"""
         # say greeting
-        greeting = "Hello, this is Jennifer. How can I help you today?"
-        pcm_audio = synthesize_speech(greeting, lambda: self.interrupted)
+        pcm_audio = _get_greeting()
         if pcm_audio and not self.interrupted:
             self.audio_processor.send_audio_to_twilio(pcm_audio)
 
         while not self.stop_event.is_set():
+            self.check_deadlines()
             try:
-                utterance = self.audio_processor.utterance_queue.get(timeout=0.1)
+                utterance = self.audio_processor.utterance_queue.get(timeout=self.wait_timeout())
+                if utterance is None:
+                    continue
                 
                 self.session.set_state("THINKING")
                 user_text = transcribe_audio(utterance)
@@ -279,52 +533,21 @@ class CallLogic(threading.Thread):
                 self.last_utterance_time = current_time
                 logging.info(f"User: {user_text}")
                 
+                self.check_deadlines()
                 if self.interrupted:
                     self.interrupted = False
                     self.session.set_state("LISTENING")
                     continue
                 
-                # get AI response
-                response_json = generate_response(self.session, user_text)
-                
-                if response_json:
-                    action = response_json.get("action", "respond")
-                    text_to_speak = response_json.get("text", "").strip()
-                    
-                    if text_to_speak and len(text_to_speak) > 2:
-                        time.sleep(AGENT_RESPONSE_DELAY_MS / 1000.0)
-                        
-                        if self.interrupted:
-                            self.interrupted = False
-                            self.session.set_state("LISTENING")
-                            continue
-                        
-                        # synthesize and play response
-                        response_pcm = synthesize_speech(text_to_speak, lambda: self.interrupted)
-                        if response_pcm and not self.interrupted:
-                            self.audio_processor.send_audio_to_twilio(response_pcm)
-                            logging.info(f"Agent: {text_to_speak}")
-                        elif self.interrupted:
-                            self.interrupted = False
-                            self.session.set_state("LISTENING")
-                        else:
-                            logging.warning("TTS failed, ending call")
-                            self.stop()
-                    
-                    if action == "hangup":
-                        logging.info("Ending call")
-                        threading.Timer(3.0, self.stop).start()
+                # get AI response, speaking each sentence as soon as it is generated
+                self.handle_response(*self.respond(user_text))
 
             except queue.Empty:
                 # process pending utterance if timeout elapsed
                 if self.pending_utterance and (time.time() - self.last_utterance_time) > self.utterance_timeout:
-                    response_json = generate_response(self.session, self.pending_utterance)
-                    if response_json and response_json.get("text"):
-                        time.sleep(AGENT_RESPONSE_DELAY_MS / 1000.0)
-                        response_pcm = synthesize_speech(response_json.get("text"))
-                        if response_pcm:
-                            self.audio_processor.send_audio_to_twilio(response_pcm)
-                    self.pending_utterance = ""
+                    user_text, self.pending_utterance = self.pending_utterance, ""
+                    logging.info(f"User: {user_text}")
+                    self.handle_response(*self.respond(user_text))
                 
                 # check max call duration
                 if self.session.should_end():
@@ -367,8 +590,6 @@ def register_routes(app, sock):
         """Handle WebSocket connection for audio streaming"""
         logging.info("WebSocket connected")
         session, audio_processor, call_logic = None, None, None
-        frame_buffer = bytearray()
-        frame_bytes = int(AUDIO_SAMPLE_RATE * 2 * (20 / 1000))
         
         try:
             while True:
@@ -376,7 +597,7 @@ def register_routes(app, sock):
                 if message is None:
                     continue
                     
-                data = json.loads(message)
+                data = _loads(message)
                 
                 if data['event'] == 'start':
                     # start new call
@@ -391,13 +612,7 @@ def register_routes(app, sock):
                 elif data['event'] == 'media':
                     # incoming audio from user
                     if audio_processor:
-                        pcm_bytes = decode_mulaw(data['media']['payload'])
-                        frame_buffer.extend(pcm_bytes)
-                        # process in 20ms frames
-                        while len(frame_buffer) >= frame_bytes:
-                            frame = frame_buffer[:frame_bytes]
-                            frame_buffer = frame_buffer[frame_bytes:]
-                            audio_processor.add_incoming_audio(frame)
+                        audio_processor.add_incoming_audio(data['media']['payload'])
                             
                 elif data['event'] == 'mark':
                     # audio playback markers